@@ -1,11 +1,23 @@
-import os, json, time
-import requests
-import pandas as pd
+import os, re, time, asyncio
+import orjson
+import httpx
+import numpy as np
+# numba opsiyonel. GitHub workflow'u bilerek kurmaz: runner her koşuda sıfırdan
+# başladığından JIT cache kalıcı değil ve import + derleme süresi (~1 sn)
+# 50 sembollük EMA hesabından çok daha uzun sürer.
+try:
+    from numba import njit
+except ImportError:     # numba yoksa saf Python olarak çalışır
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
 from datetime import datetime, timezone, timedelta
 
 # ===================== AYARLAR =====================
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
+_TELEGRAM_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage" if TELEGRAM_TOKEN else None
 
 OKX = "https://www.okx.com"
 UA = {"User-Agent": "whale-4h-screener/1.0"}
@@ -16,6 +28,10 @@ CANDLE_LIMIT = 120
 
 # Top 50 hacim
 TOP_N = 50
+_STABLE_PREFIXES = ("USDT-", "USDC-", "DAI-", "FDUSD-", "TUSD-")
+_FILTER = re.compile(
+    r"^(?!" + "|".join(re.escape(p) for p in _STABLE_PREFIXES) + r").+-USDT$"
+).match
 
 # Hacim spike ayarları
 VOL_SPIKE_LOOKBACK = 3      # son 3 mum
@@ -29,6 +45,12 @@ EMA_SLOW = 50
 RETURN_LOOKBACK = 5
 MIN_4H_RETURN_PCT = 1.0
 
+# Ticker ön filtresi: 24s getirisi bunun altındaki coinler için mum çekilmez
+MIN_24H_RETURN_PCT = 0.0
+
+# Analiz için gereken en az mum sayısı
+MIN_BARS = EMA_SLOW + VOL_BASELINE + VOL_SPIKE_LOOKBACK + 5
+
 # Whale benzeri trade
 ENABLE_WHALE = True
 WHALE_NOTIONAL_USDT = 50_000
@@ -38,7 +60,22 @@ TRADES_LIMIT = 100
 DAILY_ALERT_LIMIT = 3
 COOLDOWN_HOURS = 18
 STATE_PATH = ".cache/whale_4h_state.json"
-REQUEST_SLEEP = 0.08
+
+# Mum cache: sadece aynı 4H penceresindeki tekrar çalıştırmalarda (manuel /
+# workflow_dispatch) isabet eder. Zamanlanmış workflow 4H'de bir, temiz
+# checkout ile koşar; orada hiç isabet etmez. Bu yüzden varsayılan kapalı,
+# CANDLE_CACHE_DIR ortam değişkeni ile açılır (ör. ".cache/candles").
+CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR")
+CANDLE_CACHE_MAX_AGE = 24 * 3600
+
+# Eşzamanlılık & rate limit (OKX)
+CONCURRENCY = 10            # aynı anda en fazla kaç sembol taranır
+RATE_LIMIT_RPS = 20
+RATE_LIMIT_CODES = ("50011", "50061")   # OKX "too many requests"
+RETRY_MAX = 3
+RETRY_STATUS = (429, 500, 502, 503, 504)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
 
 # ===================== YARDIMCI =====================
 def utc_now():
@@ -50,142 +87,338 @@ def safe_float(x, default=0.0):
     except:
         return default
 
-def ensure_state():
+# İstekler arasında en az 1/rps saniye bırakır; gerekmedikçe beklemez
+class AsyncRateLimiter:
+    def __init__(self, rps):
+        self.interval = 1.0 / rps
+        self.last_call = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            delay = self.interval - (time.monotonic() - self.last_call)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.last_call = time.monotonic()
+
+def retry_delay(attempt):
+    return min(RETRY_MAX_DELAY, max(RETRY_BASE_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+def cooldown_ts(v):
+    # Cooldown bitişi unix epoch (float); eski ISO string kayıtlar da okunur
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return datetime.fromisoformat(v.replace("Z", "+00:00")).timestamp()
+    except:
+        return 0.0
+
+def ensure_dirs():
+    # Başlangıçta bir kez; save_* fonksiyonları dizinin var olduğunu varsayar
     os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    if CANDLE_CACHE_DIR:
+        os.makedirs(CANDLE_CACHE_DIR, exist_ok=True)
+
+def ensure_state():
     if not os.path.exists(STATE_PATH):
         return {"date": "", "sent": 0, "cooldown": {}}
     try:
-        with open(STATE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
+        with open(STATE_PATH, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError) as e:
+        print(f"⚠️ State okunamadı ({STATE_PATH}): {e}")
         return {"date": "", "sent": 0, "cooldown": {}}
 
 def save_state(state):
-    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
-    with open(STATE_PATH, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
-
-def send_telegram(text):
-    if not TELEGRAM_TOKEN or not CHAT_ID:
+    # Atomik yazım: yarım kalan yazım mevcut state'i bozmaz
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(state))
+    os.replace(tmp, STATE_PATH)
+
+async def send_telegram_async(session, text):
+    if not _TELEGRAM_URL or not CHAT_ID:
         print(text)
         return
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    r = requests.post(url, data={
+    r = await session.post(_TELEGRAM_URL, data={
         "chat_id": CHAT_ID,
         "text": text,
-        "disable_web_page_preview": True
-    }, timeout=20)
+        "disable_web_page_preview": "true"
+    })
     r.raise_for_status()
 
-def okx_get(path, params=None):
-    r = requests.get(OKX + path, params=params or {}, headers=UA, timeout=20)
-    r.raise_for_status()
-    j = r.json()
-    if j.get("code") != "0":
-        raise RuntimeError(j)
-    return j["data"]
+async def save_state_async(state):
+    await asyncio.to_thread(save_state, state)
 
-# ===================== OKX DATA =====================
-def list_top50_usdt_spot():
-    data = okx_get("/api/v5/market/tickers", {"instType": "SPOT"})
-    rows = []
-    for r in data:
-        instId = r.get("instId", "")
-        if not instId.endswith("-USDT"):
-            continue
-        if instId.startswith(("USDT-", "USDC-", "DAI-", "FDUSD-", "TUSD-")):
-            continue
-        volq = safe_float(r.get("volCcyQuote"), 0)
-        if volq <= 0:
+async def okx_get_async(session, limiter, path, params=None):
+    for attempt in range(RETRY_MAX + 1):
+        await limiter.wait()
+        retry = attempt < RETRY_MAX
+        try:
+            r = await session.get(OKX + path, params=params or {})
+            if r.status_code in RETRY_STATUS and retry:
+                j = None
+            else:
+                r.raise_for_status()
+                j = orjson.loads(r.content)
+        except httpx.TransportError:
+            if not retry:
+                raise
+            j = None
+        if j is None or (j.get("code") in RATE_LIMIT_CODES and retry):
+            await asyncio.sleep(retry_delay(attempt))
             continue
-        rows.append({"instId": instId, "vol": volq})
-    rows.sort(key=lambda x: x["vol"], reverse=True)
-    return [x["instId"] for x in rows[:TOP_N]]
+        if j.get("code") != "0":
+            raise RuntimeError(j)
+        return j["data"]
 
-def get_candles(instId):
-    data = okx_get("/api/v5/market/candles", {
+# ===================== OKX DATA =====================
+async def list_top50_usdt_spot_async(session, limiter):
+    data = await okx_get_async(session, limiter, "/api/v5/market/tickers", {"instType": "SPOT"})
+    # 1. geçiş: say, 2. geçiş: önceden ayrılmış structured array'e yaz
+    n = sum(1 for r in data if ticker_quote_vol(r) > 0)
+    if not n:
+        return []
+    arr = np.empty(n, dtype=[("id", "U32"), ("vol", "f8"), ("chg", "f8")])
+    k = 0
+    for r in data:
+        volq = ticker_quote_vol(r)
+        if volq > 0:
+            arr[k] = (r["instId"], volq, ticker_24h_pct(r))
+            k += 1
+    vols = arr["vol"]
+    # Tam sıralama yerine top-k seç, sadece seçilenleri sırala
+    idx = np.argpartition(-vols, min(TOP_N, n - 1))[:TOP_N]
+    idx = idx[np.argsort(-vols[idx], kind="stable")]
+    # Kaba momentum ön filtresi (tek tickers isteğinden, ek HTTP yok)
+    idx = idx[arr["chg"][idx] > MIN_24H_RETURN_PCT]
+    return arr["id"][idx].tolist()
+
+def ticker_quote_vol(r):
+    # Uygun USDT spot çifti ise quote hacmi, değilse 0
+    if not _FILTER(r.get("instId", "")):
+        return 0.0
+    return safe_float(r.get("volCcyQuote"), 0)
+
+def ticker_24h_pct(r):
+    open24h = safe_float(r.get("open24h"), 0)
+    if open24h <= 0:
+        return 0.0
+    return (safe_float(r.get("last"), 0) / open24h - 1) * 100
+
+async def get_candles_async(session, limiter, instId):
+    # Cache açık ve kayıt varsa önce son 2 mumu yokla; yoksa doğrudan tam geçmişi çek
+    if CANDLE_CACHE_DIR:
+        cached = await asyncio.to_thread(load_cached_candles, instId)
+        if cached is not None:
+            peek = await okx_get_async(session, limiter, "/api/v5/market/candles", {
+                "instId": instId, "bar": BAR, "limit": "2"
+            })
+            candles = candles_from_cache(cached, peek)
+            if candles is not None:
+                return candles
+    data = await okx_get_async(session, limiter, "/api/v5/market/candles", {
         "instId": instId, "bar": BAR, "limit": str(CANDLE_LIMIT)
     })
-    rows = []
+    if len(data) < MIN_BARS:
+        return None
+    candles = parse_candles(data)
+    if CANDLE_CACHE_DIR:
+        await asyncio.to_thread(save_closed_candles, instId, data, candles)
+    return candles
+
+def parse_candles(data):
+    # Sadece analizde kullanılan alanlar: ts, close, volCcyQuote
+    n = len(data)
+    ts = np.empty(n, dtype=np.int64)
+    close = np.empty(n, dtype=np.float64)
+    volq = np.empty(n, dtype=np.float64)
+    for i, c in enumerate(data):
+        ts[i] = int(c[0])
+        close[i] = safe_float(c[4])
+        # volCcyQuote yoksa volCcy (SPOT'ta zaten quote cinsinden)
+        volq[i] = safe_float(c[7]) or safe_float(c[6])
+    idx = np.argsort(ts, kind="stable")
+    return ts[idx], close[idx], volq[idx]
+
+def latest_closed_ts(data):
+    # OKX mumları yeniden eskiye döner; c[8] == "1" kapanmış mum
     for c in data:
-        rows.append({
-            "ts": int(c[0]),
-            "close": safe_float(c[4]),
-            "volQuote": safe_float(c[7])
-        })
-    df = pd.DataFrame(rows).sort_values("ts").reset_index(drop=True)
-    return df
-
-def get_whale_flow(instId):
-    data = okx_get("/api/v5/market/trades", {
-        "instId": instId, "limit": str(TRADES_LIMIT)
-    })
-    buy = sell = 0.0
-    for t in data:
-        px = safe_float(t.get("px"))
-        sz = safe_float(t.get("sz"))
-        notional = px * sz
-        if notional >= WHALE_NOTIONAL_USDT:
-            if t.get("side") == "buy":
-                buy += notional
-            elif t.get("side") == "sell":
-                sell += notional
-    return buy, sell
+        if len(c) > 8 and c[8] == "1":
+            return int(c[0])
+    return None
 
-# ===================== ANALİZ =====================
-def ema(series, n):
-    return series.ewm(span=n, adjust=False).mean()
+def candle_cache_path(instId):
+    return os.path.join(CANDLE_CACHE_DIR, instId + ".npz")
 
-def analyze_inst(instId):
-    df = get_candles(instId)
-    if len(df) < (EMA_SLOW + VOL_BASELINE + VOL_SPIKE_LOOKBACK + 5):
+def load_cached_candles(instId):
+    path = candle_cache_path(instId)
+    try:
+        if time.time() - os.path.getmtime(path) > CANDLE_CACHE_MAX_AGE:
+            os.remove(path)
+            return None
+        with np.load(path) as z:
+            return z["ts"], z["close"], z["volq"], int(z["last_closed_ts"])
+    except:
         return None
 
-    close = df["close"]
-    volq = df["volQuote"]
-
-    df["ema_fast"] = ema(close, EMA_FAST)
-    df["ema_slow"] = ema(close, EMA_SLOW)
+def save_closed_candles(instId, data, candles):
+    # Sadece kapanmış mumlar yazılır; atomik (tmp + os.replace)
+    closed_ts = latest_closed_ts(data)
+    if closed_ts is None:
+        return
+    ts, close, volq = candles
+    m = ts <= closed_ts
+    path = candle_cache_path(instId)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, ts=ts[m], close=close[m], volq=volq[m], last_closed_ts=np.int64(closed_ts))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+def candles_from_cache(cached, peek):
+    # Son kapanmış mum cache ile aynıysa: cache + canlı (kapanmamış) mum
+    closed_ts = latest_closed_ts(peek)
+    if closed_ts is None or cached[3] != closed_ts:
+        return None
+    ts, close, volq, _ = cached
+    live = [c for c in peek if int(c[0]) > closed_ts]
+    if len(ts) + len(live) < MIN_BARS:
+        return None
+    if live:
+        lts, lclose, lvolq = parse_candles(live)
+        ts = np.concatenate((ts, lts))
+        close = np.concatenate((close, lclose))
+        volq = np.concatenate((volq, lvolq))
+    return ts, close, volq
+
+async def get_whale_flow_async(session, limiter, instId):
+    data = await okx_get_async(session, limiter, "/api/v5/market/trades", {
+        "instId": instId, "limit": str(TRADES_LIMIT)
+    })
+    n = len(data)
+    px = np.fromiter((safe_float(t.get("px")) for t in data), dtype=np.float64, count=n)
+    sz = np.fromiter((safe_float(t.get("sz")) for t in data), dtype=np.float64, count=n)
+    side = np.array([t.get("side", "") for t in data], dtype=object)
+    notional = px * sz
+    mask = notional >= WHALE_NOTIONAL_USDT
+    buy = float(notional[mask & (side == "buy")].sum())
+    sell = float(notional[mask & (side == "sell")].sum())
+    return buy, sell
 
-    # Trend UP
-    if not (close.iloc[-1] > df["ema_fast"].iloc[-1] > df["ema_slow"].iloc[-1]):
+# ===================== ANALİZ =====================
+# Sıra bir değişmezdir: önce O(1) momentum/hacim kontrolleri (prefilter),
+# sonra O(n) EMA trend kontrolü (trend_filter), en son whale trades isteği.
+# Sembollerin çoğu ilk adımda elenir; pahalı adımlar yalnızca geçenler için çalışır.
+
+@njit(cache=True, fastmath=True)
+def ema_mat_last(x, fast, slow):
+    # x: (zaman, sembol); iki EMA'nın son değeri (ewm(span=n, adjust=False) ile aynı).
+    # Her adımda bitişik bir satır okunur ve tüm semboller tek vektör işlemiyle güncellenir.
+    af = 2.0 / (fast + 1)
+    a_s = 2.0 / (slow + 1)
+    ef = x[0].copy()
+    es = x[0].copy()
+    for t in range(1, x.shape[0]):
+        ef += af * (x[t] - ef)
+        es += a_s * (x[t] - es)
+    return ef, es
+
+def warm_kernel():
+    # JIT derlemesini taramadan önce bir kez yap (numba kuruluysa)
+    ema_mat_last(np.ones((MIN_BARS, 1), dtype=np.float64), EMA_FAST, EMA_SLOW)
+
+def stack_closes(closes):
+    # (zaman, sembol) matrisi. Farklı uzunluktaki serileri ilk close ile üstten
+    # doldur: sabit seri üzerinde EMA değişmediği için sonuç tek tek hesaplamayla aynıdır
+    L = max(len(c) for c in closes)
+    mat = np.empty((L, len(closes)), dtype=np.float64)
+    for j, c in enumerate(closes):
+        pad = L - len(c)
+        mat[:pad, j] = c[0]
+        mat[pad:, j] = c
+    return mat
+
+def prefilter(instId, candles):
+    if candles is None:
         return None
+    ts, close, volq = candles
 
     # Momentum
-    ret = (close.iloc[-1] / close.iloc[-(RETURN_LOOKBACK+1)] - 1) * 100
+    ret = (close[-1] / close[-(RETURN_LOOKBACK+1)] - 1) * 100
     if ret < MIN_4H_RETURN_PCT:
         return None
 
     # Volume spike
-    recent_avg = volq.iloc[-VOL_SPIKE_LOOKBACK:].mean()
-    base_avg = volq.iloc[-(VOL_BASELINE+VOL_SPIKE_LOOKBACK):-VOL_SPIKE_LOOKBACK].mean()
+    recent_avg = volq[-VOL_SPIKE_LOOKBACK:].mean()
+    base_avg = volq[-(VOL_BASELINE+VOL_SPIKE_LOOKBACK):-VOL_SPIKE_LOOKBACK].mean()
     if base_avg <= 0:
         return None
 
     vol_ratio = recent_avg / base_avg
-    last_ratio = volq.iloc[-1] / base_avg
+    last_ratio = volq[-1] / base_avg
 
     if vol_ratio < VOL_RATIO_MIN or last_ratio < LAST_CANDLE_RATIO_MIN:
         return None
 
-    whale_buy = whale_sell = 0.0
-    if ENABLE_WHALE:
-        try:
-            whale_buy, whale_sell = get_whale_flow(instId)
-        except:
-            pass
-
     return {
         "instId": instId,
-        "close": float(close.iloc[-1]),
+        "close": float(close[-1]),
         "ret": float(ret),
         "vol_ratio": float(vol_ratio),
         "last_ratio": float(last_ratio),
-        "whale_net": whale_buy - whale_sell
+        "whale_net": 0.0
     }
 
+def trend_filter(rows):
+    # rows: [(sonuç, close dizisi)]; EMA'lar tüm semboller için tek çağrıda
+    if not rows:
+        return []
+    ema_fast, ema_slow = ema_mat_last(stack_closes([c for _, c in rows]), EMA_FAST, EMA_SLOW)
+    return [
+        r for (r, c), f, s in zip(rows, ema_fast, ema_slow)
+        if c[-1] > f > s    # Trend UP
+    ]
+
+async def prefilter_async(session, limiter, instId):
+    candles = await get_candles_async(session, limiter, instId)
+    r = prefilter(instId, candles)
+    return (r, candles[1]) if r else None
+
+async def add_whale_async(session, limiter, r):
+    try:
+        buy, sell = await get_whale_flow_async(session, limiter, r["instId"])
+        r["whale_net"] = buy - sell
+    except:
+        pass
+    return r
+
+async def scan(session, limiter, insts):
+    sem = asyncio.Semaphore(CONCURRENCY)
+    out = await asyncio.gather(
+        *[bounded(sem, prefilter_async(session, limiter, i)) for i in insts],
+        return_exceptions=True
+    )
+    for i, x in zip(insts, out):
+        if isinstance(x, Exception):
+            print(f"⚠️ {i} atlandı: {x!r}")
+    results = trend_filter([x for x in out if isinstance(x, tuple)])
+    if ENABLE_WHALE:
+        results = await asyncio.gather(*[bounded(sem, add_whale_async(session, limiter, r)) for r in results])
+    return list(results)
+
 # ===================== MAIN =====================
+async def bounded(sem, coro):
+    async with sem:
+        return await coro
+
 def main():
+    ensure_dirs()
+    asyncio.run(run())
+
+async def run():
     state = ensure_state()
     today = utc_now().strftime("%Y-%m-%d")
     if state.get("date") != today:
@@ -196,54 +429,53 @@ def main():
     if state["sent"] >= DAILY_ALERT_LIMIT:
         return
 
-    insts = list_top50_usdt_spot()
-    results = []
-
-    for instId in insts:
-        cd = state["cooldown"].get(instId)
-        if cd:
-            try:
-                if utc_now() < datetime.fromisoformat(cd.replace("Z","+00:00")):
-                    continue
-            except:
-                pass
-
-        try:
-            r = analyze_inst(instId)
-            if r:
-                results.append(r)
-        except:
-            pass
-
-        time.sleep(REQUEST_SLEEP)
-
-    if not results:
-        send_telegram("🕵️ 4H Whale/Hacim Tarama: Top50 içinde şartlara uyan coin yok.")
-        return
-
-    results.sort(key=lambda x: (x["vol_ratio"], x["ret"], x["whale_net"]), reverse=True)
-    top = results[:7]
-
-    now = utc_now().strftime("%Y-%m-%d %H:%M UTC")
-    lines = [
-        f"🐳 4H HACİM + UP TREND (TOP50) | {now}",
-        f"Filtre: EMA{EMA_FAST}>{EMA_SLOW} | VolSpike≥{VOL_RATIO_MIN}x | Ret≥{MIN_4H_RETURN_PCT}%",
-        ""
-    ]
-
-    for i, x in enumerate(top, 1):
-        wn = x["whale_net"]
-        whale_txt = f" | WhaleNet:{wn/1000:.0f}k" if ENABLE_WHALE else ""
-        lines.append(
-            f"{i}) {x['instId']} | close:{x['close']:.6g} | "
-            f"ret{RETURN_LOOKBACK}:{x['ret']:.2f}% | "
-            f"vol:{x['vol_ratio']:.2f}x (last:{x['last_ratio']:.2f}x){whale_txt}"
-        )
-        state["cooldown"][x["instId"]] = (utc_now() + timedelta(hours=COOLDOWN_HOURS)).isoformat().replace("+00:00","Z")
-
-    state["sent"] += 1
-    save_state(state)
-    send_telegram("\n".join(lines))
+    state["cooldown"] = {k: cooldown_ts(v) for k, v in state["cooldown"].items()}
+
+    warm_kernel()
+    # Lock o anki event loop'a bağlanır; her run() kendi limiter'ını kurar
+    limiter = AsyncRateLimiter(RATE_LIMIT_RPS)
+    # HTTP/2: tüm istekler tek TCP+TLS bağlantısı üzerinden çoklanır
+    async with httpx.AsyncClient(
+        http2=True, timeout=20, headers=UA,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+    ) as session:
+        now_ts = utc_now().timestamp()
+        cooldowns = state["cooldown"]
+        insts = [
+            i for i in await list_top50_usdt_spot_async(session, limiter)
+            if cooldowns.get(i, 0.0) <= now_ts
+        ]
+
+        results = await scan(session, limiter, insts)
+
+        if not results:
+            await send_telegram_async(session, "🕵️ 4H Whale/Hacim Tarama: Top50 içinde şartlara uyan coin yok.")
+            return
+
+        results.sort(key=lambda x: (x["vol_ratio"], x["ret"], x["whale_net"]), reverse=True)
+        top = results[:7]
+
+        now = utc_now().strftime("%Y-%m-%d %H:%M UTC")
+        lines = [
+            f"🐳 4H HACİM + UP TREND (TOP50) | {now}",
+            f"Filtre: EMA{EMA_FAST}>{EMA_SLOW} | VolSpike≥{VOL_RATIO_MIN}x | Ret≥{MIN_4H_RETURN_PCT}%",
+            ""
+        ]
+
+        cooldown_until = (utc_now() + timedelta(hours=COOLDOWN_HOURS)).timestamp()
+        for i, x in enumerate(top, 1):
+            wn = x["whale_net"]
+            whale_txt = f" | WhaleNet:{wn/1000:.0f}k" if ENABLE_WHALE else ""
+            lines.append(
+                f"{i}) {x['instId']} | close:{x['close']:.6g} | "
+                f"ret{RETURN_LOOKBACK}:{x['ret']:.2f}% | "
+                f"vol:{x['vol_ratio']:.2f}x (last:{x['last_ratio']:.2f}x){whale_txt}"
+            )
+            state["cooldown"][x["instId"]] = cooldown_until
+
+        state["sent"] += 1
+        # State yazımı ve Telegram POST aynı anda
+        await asyncio.gather(save_state_async(state), send_telegram_async(session, "\n".join(lines)))
 
 if __name__ == "__main__":
     main()